@@ -244,34 +244,40 @@ bool PMACFilterController::_handle_request(const json &request, json &response)
 */
 bool PMACFilterController::_handle_config(const json &config)
 {
-    bool success = false;
+    bool success = true;
+    bool found = false;
 
     if (config.contains(CONFIG_MODE))
     {
-        success = this->_set_mode(config[CONFIG_MODE]);
+        found = true;
+        success &= this->_set_mode(config[CONFIG_MODE]);
     }
     if (config.contains(CONFIG_IN_POSITIONS))
     {
-        success = this->_set_positions(this->in_positions_, config[CONFIG_IN_POSITIONS]);
+        found = true;
+        success &= this->_set_positions(this->in_positions_, config[CONFIG_IN_POSITIONS]);
     }
     if (config.contains(CONFIG_OUT_POSITIONS))
     {
-        success = this->_set_positions(this->out_positions_, config[CONFIG_OUT_POSITIONS]);
+        found = true;
+        success &= this->_set_positions(this->out_positions_, config[CONFIG_OUT_POSITIONS]);
     }
     if (config.contains(CONFIG_SHUTTER_CLOSED_POSITION))
     {
-        success = this->_set_shutter_closed_position(config[CONFIG_SHUTTER_CLOSED_POSITION]);
+        found = true;
+        success &= this->_set_shutter_closed_position(config[CONFIG_SHUTTER_CLOSED_POSITION]);
     }
     if (config.contains(CONFIG_PIXEL_COUNT_THRESHOLDS))
     {
-        success = this->_set_pixel_count_thresholds(config[CONFIG_PIXEL_COUNT_THRESHOLDS]);
+        found = true;
+        success &= this->_set_pixel_count_thresholds(config[CONFIG_PIXEL_COUNT_THRESHOLDS]);
     }
     if (config.contains(CONFIG_ATTENUATION))
     {
+        found = true;
         if (this->mode_ == ControlMode::MANUAL)
         {
             this->_set_attenuation(config[CONFIG_ATTENUATION]);
-            success = true;
         }
         else
         {
@@ -281,15 +287,16 @@ bool PMACFilterController::_handle_config(const json &config)
     }
     if (config.contains(CONFIG_TIMEOUT))
     {
-        success = this->_set_timeout(config[CONFIG_TIMEOUT]);
+        found = true;
+        success &= this->_set_timeout(config[CONFIG_TIMEOUT]);
     }
 
-    if (!success)
+    if (!success || !found)
     {
         std::cout << "Given configuration failed or found no valid config parameters" << std::endl;
     }
 
-    return success;
+    return success && found;
 }
 
 /*!
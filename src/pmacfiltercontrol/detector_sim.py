@@ -2,29 +2,19 @@ import random
 from time import sleep
 from typing import Dict, List
 
+import orjson
 import typer
 import zmq
 
-
-JSON_TEMPLATE = """
-{{
-    "frame_number": {frame_number},
-    "parameters": {{
-        "high3": {high3},
-        "high2": {high2},
-        "high1": {high1},
-        "low1": {low1},
-        "low2": {low2}
-    }}
-}}
-"""
+PARAMETERS = ("high3", "high2", "high1", "low1", "low2")
 
 THRESHOLD_LEVEL = 4
 
 
 class DetectorSim:
-    def __init__(self, ports: List[int]) -> None:
+    def __init__(self, ports: List[int], verbose: bool = True) -> None:
         context = zmq.Context()
+        self.verbose = verbose
 
         self.endpoints = [f"tcp://*:{port}" for port in ports]
         print(f"Publishing on {self.endpoints}")
@@ -108,12 +98,18 @@ class DetectorSim:
             data: Dictionary of data to publish
 
         """
-        message = JSON_TEMPLATE.format(**data)
+        message = orjson.dumps(
+            {
+                "frame_number": data["frame_number"],
+                "parameters": {key: data[key] for key in PARAMETERS},
+            }
+        )
 
         idx = self.frame_number % len(self.sockets)
-        print(f"{self.endpoints[idx]} -> ")
-        print(message)
-        self.sockets[idx].send_string(message)
+        if self.verbose:
+            print(f"{self.endpoints[idx]} -> ")
+            print(message.decode())
+        self.sockets[idx].send(message)
 
         self.frame_number += 1
 
@@ -132,8 +128,9 @@ def main(
     rate: float = 1,
     frame_count: int = 0,
     singleshot_length: int = 0,
+    verbose: bool = True,
 ):
-    DetectorSim(ports).run(rate, frame_count, singleshot_length)
+    DetectorSim(ports, verbose).run(rate, frame_count, singleshot_length)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
+import orjson
 import typer
 import zmq
-import json
 
 
 class EventSubscriber:
@@ -24,7 +24,7 @@ class EventSubscriber:
             if not self.poller.poll(timeout):
                 raise IOError("Did not receive event within timeout")
 
-        return json.loads(self.socket.recv())
+        return orjson.loads(self.socket.recv())
 
     def stop(self):
         """Close socket"""
@@ -1,11 +1,14 @@
 """HDF5 adapter for use in PMAC Filter Control."""
 
+import logging
 import os
-from typing import Optional
+import threading
+from typing import Optional, Union, cast
 
 import h5py
-from numpy import int64 as np_int64
-from numpy import issubdtype
+import numpy as np
+
+log = logging.getLogger(__name__)
 
 ATTENUATION_KEY = "attenuation"
 ADJUSTMENT_KEY = "adjustment"
@@ -13,6 +16,18 @@ FRAME_NUMBER_KEY = "frame_number"
 UID_KEY = "uid"
 FILTERS_MOVING_FLAG_KEY = "filters_moving"
 
+# Number of frames buffered before being written to the file in a single batch
+FRAME_BUFFER_SIZE = 128
+# Number of frames stored in each HDF5 chunk
+DATASET_CHUNK_SIZE = 8192
+# All values written are small integers, so int32 is ample
+DATASET_DTYPE = np.int32
+# File space page size in bytes, matching the chunk size so each chunk fills a page
+FILE_SPACE_PAGE_SIZE = DATASET_CHUNK_SIZE * np.dtype(DATASET_DTYPE).itemsize
+# Chunk cache size in bytes and hash table slots (a prime) for the open file
+CHUNK_CACHE_SIZE = 16 * 1024 * 1024
+CHUNK_CACHE_SLOTS = 521
+
 
 class HDFAdapter:
     """An adapter for HDF5 file writing."""
@@ -31,6 +46,21 @@ class HDFAdapter:
         self.file: Optional[h5py.File] = None
         self.file_open: bool = False
 
+        # Dataset handles, valid while a file is open
+        self.adjustment_dset: h5py.Dataset = None
+        self.attenuation_dset: h5py.Dataset = None
+        self.uid_dataset: h5py.Dataset = None
+        self.filters_moving_flag_dataset: h5py.Dataset = None
+        self._dset_size: int = 0
+        self._frame_count: int = 0
+
+        # Buffered frames, one row per frame:
+        # (frame_number, adjustment, attenuation)
+        self._frame_buffer = np.empty((FRAME_BUFFER_SIZE, 3), dtype=DATASET_DTYPE)
+        self._buffered_frames: int = 0
+        # Serialises batch writes from a worker thread with closing the file
+        self._lock = threading.RLock()
+
     def _set_file_path(self, new_file_path: str) -> None:
         """Set HDF5 file path.
 
@@ -40,84 +70,194 @@ class HDFAdapter:
         if self._check_path(new_file_path):
             self.file_path = new_file_path
 
-    def _open_file(self) -> None:
-        """Open a HDF5 file if one is not already open."""
+    def _open_file(
+        self, expected_frames: Optional[int] = None, file_path: Optional[str] = None
+    ) -> None:
+        """Open a HDF5 file if one is not already open.
+
+        Args:
+            expected_frames (int, optional): Number of frames to allocate space for
+                up front, if known. Defaults to None.
+            file_path (str, optional): Path of the file to open. Defaults to the
+                current file path.
+        """
+        file_path = file_path or self.file_path
         if self.file is None:
-            if self._check_path(self.file_path):
-                self.file = h5py.File(self.file_path, "w", libver="latest")
-                print(f"* File {self.file} is open.")
-                self._setup_datasets()
+            if self._check_path(file_path):
+                try:
+                    self.file = h5py.File(
+                        file_path,
+                        "w",
+                        libver="latest",
+                        locking=False,
+                        fs_strategy="page",
+                        fs_page_size=FILE_SPACE_PAGE_SIZE,
+                        rdcc_nbytes=CHUNK_CACHE_SIZE,
+                        rdcc_nslots=CHUNK_CACHE_SLOTS,
+                    )
+                except OSError as e:
+                    log.error("* Failed opening file %s.\n%s", file_path, e)
+                    return
+                log.info("* File %s is open.", file_path)
+                self._setup_datasets(expected_frames or 1)
                 self.file_open = True
         else:
-            if self.file_path != self.file.filename:
-                print("* Another file is already open and being written to.")
+            if file_path != self.file.filename:
+                log.warning("* Another file is already open and being written to.")
 
     def _close_file(self) -> None:
         """Close the HDF5 file if one is already open."""
         if self.file is not None:
-            try:
-                assert isinstance(self.file, h5py.File)
-                print(f"* File {self.file} has been closed.")
-                self.file.close()
-                self.file = None
-                self.file_open = False
-            except Exception as e:
-                print(f"* Failed closing file.\n{e}")
+            with self._lock:
+                try:
+                    self._flush_buffer()
+                    # Trim the unused capacity left over from preallocation or
+                    # geometric growth
+                    if max(self._frame_count, 1) < self._dset_size:
+                        self._resize_datasets(max(self._frame_count, 1))
+                    log.info("* File %s has been closed.", self.file.filename)
+                    self.file.close()
+                    self.file = None
+                    self.file_open = False
+                    self.adjustment_dset = None
+                    self.attenuation_dset = None
+                    self.uid_dataset = None
+                    self.filters_moving_flag_dataset = None
+                except Exception as e:
+                    log.error("* Failed closing file.\n%s", e)
 
     def _check_path(self, file_path: str) -> bool:
         """Check that the provided file path is valid."""
         if file_path == "" or file_path is None:
-            print(f"* Please enter a valid file path.\nPath={self.file_path}")
+            log.warning("* Please enter a valid file path.\nPath=%s", file_path)
         else:
-            parent_path: str = file_path.rsplit("/", 1)[0]
+            parent_path: str = os.path.dirname(file_path) or "."
             if not os.path.isdir(parent_path):
-                print("* Path not found. Enter a valid path.")
-            elif os.path.isfile(file_path):
-                print("* File already exists.")
+                log.warning("* Path not found. Enter a valid path.")
+            elif os.path.lexists(file_path):
+                log.warning("* File already exists.")
             else:
                 return True
 
         return False
 
-    def _setup_datasets(self) -> None:
-        """Dataset setup in the HDF5 file."""
-        print(f"* Creating/fetching datasets in HDF5 file: {self.file_path}")
-
-        def _create_dataset(key: str) -> h5py.Dataset:
-            dset: h5py.Dataset = None
-
-            assert isinstance(self.file, h5py.File)
-            dset = self.file.create_dataset(key, (1,), maxshape=(None,), dtype=int)
-
-            return dset
-
-        self.adjustment_dset = _create_dataset(ADJUSTMENT_KEY)
-        self.attenuation_dset = _create_dataset(ATTENUATION_KEY)
-        self.uid_dataset = _create_dataset(UID_KEY)
-        self.filters_moving_flag_dataset = _create_dataset(FILTERS_MOVING_FLAG_KEY)
-
-        assert isinstance(self.file, h5py.File)
-        self.file.swmr_mode = True
-
-    def _write_to_file(self, data) -> None:
-        dset_size = self.adjustment_dset.size
-        assert issubdtype(dset_size, np_int64)
-        if data[FRAME_NUMBER_KEY] >= dset_size:
-            dset_size = max(data[FRAME_NUMBER_KEY], dset_size + 1)
-            self.adjustment_dset.resize((dset_size,))
-            self.attenuation_dset.resize((dset_size,))
-            self.uid_dataset.resize((dset_size,))
-            self.filters_moving_flag_dataset.resize((dset_size,))
-
-        self.adjustment_dset[data[FRAME_NUMBER_KEY]] = data[ADJUSTMENT_KEY]
-        self.attenuation_dset[data[FRAME_NUMBER_KEY]] = data[ATTENUATION_KEY]
-        self.uid_dataset[data[FRAME_NUMBER_KEY]] = int(data[FRAME_NUMBER_KEY]) + 1
-        filters_moving = (data[ADJUSTMENT_KEY] < 0 and data[ATTENUATION_KEY] > 0) or (
-            data[ADJUSTMENT_KEY] > 0 and data[ATTENUATION_KEY] < 15
+    def _setup_datasets(self, size: int = 1) -> None:
+        """Dataset setup in the HDF5 file.
+
+        Args:
+            size (int, optional): Initial size of the datasets. Defaults to 1.
+        """
+        file = cast(h5py.File, self.file)
+        log.debug("* Creating/fetching datasets in HDF5 file: %s", file.filename)
+        dataset_options = dict(
+            shape=(size,),
+            maxshape=(None,),
+            dtype=DATASET_DTYPE,
+            chunks=(DATASET_CHUNK_SIZE,),
+            track_times=False,
+        )
+
+        self.adjustment_dset = file.create_dataset(ADJUSTMENT_KEY, **dataset_options)
+        self.attenuation_dset = file.create_dataset(ATTENUATION_KEY, **dataset_options)
+        self.uid_dataset = file.create_dataset(UID_KEY, **dataset_options)
+        self.filters_moving_flag_dataset = file.create_dataset(
+            FILTERS_MOVING_FLAG_KEY, **dataset_options
+        )
+
+        self._dset_size = size
+        self._frame_count = 0
+
+        file.swmr_mode = True
+
+    def _resize_datasets(self, size: int) -> None:
+        """Resize all datasets to the given number of frames.
+
+        Args:
+            size (int): New size of the datasets
+        """
+        self.adjustment_dset.resize((size,))
+        self.attenuation_dset.resize((size,))
+        self.uid_dataset.resize((size,))
+        self.filters_moving_flag_dataset.resize((size,))
+        self._dset_size = size
+
+    def _buffer_frame(self, data) -> bool:
+        """Add a frame to the buffer of frames waiting to be written.
+
+        Args:
+            data: Frame event dictionary received from the event stream
+
+        Returns:
+            bool: True if the buffer is now full, else False
+        """
+        buffered_frames = self._buffered_frames
+        self._frame_buffer[buffered_frames] = (
+            data[FRAME_NUMBER_KEY],
+            data[ADJUSTMENT_KEY],
+            data[ATTENUATION_KEY],
         )
-        self.filters_moving_flag_dataset[data[FRAME_NUMBER_KEY]] = filters_moving
+        buffered_frames += 1
+        self._buffered_frames = buffered_frames
+
+        return buffered_frames == FRAME_BUFFER_SIZE
+
+    def _take_buffered_frames(self) -> Optional[np.ndarray]:
+        """Take a copy of the buffered frames and empty the buffer.
+
+        Returns:
+            Optional[np.ndarray]: Buffered frames, or None if there are none
+        """
+        if self._buffered_frames == 0:
+            return None
+
+        buffered = self._frame_buffer[: self._buffered_frames].copy()
+        self._buffered_frames = 0
+        return buffered
+
+    def _flush_buffer(self) -> None:
+        """Write all buffered frames to the file in a single batch."""
+        buffered = self._take_buffered_frames()
+        if buffered is not None:
+            self._write_frames(buffered)
+
+    def _write_frames(self, buffered: np.ndarray) -> None:
+        """Write a batch of frames to the file.
+
+        Safe to call from a worker thread; writes are serialised with closing the file.
+
+        Args:
+            buffered (np.ndarray): Frames taken from the buffer
+        """
+        with self._lock:
+            if self.file is None:
+                log.warning("* File closed, dropping %d frames.", len(buffered))
+                return
+
+            # Sort by frame number, keeping the most recent entry for any repeated frame
+            frames, idx = np.unique(buffered[::-1, 0], return_index=True)
+            buffered = buffered[::-1][idx]
+
+            last_frame = int(frames[-1])
+            if last_frame >= self._dset_size:
+                self._resize_datasets(max(self._dset_size * 2, last_frame + 1))
+            self._frame_count = max(self._frame_count, last_frame + 1)
+
+            # Write contiguous frames as a slice, otherwise select each frame
+            selection: Union[slice, np.ndarray]
+            if last_frame - frames[0] + 1 == frames.size:
+                selection = np.s_[frames[0] : last_frame + 1]
+            else:
+                selection = frames
+
+            adjustment = buffered[:, 1]
+            attenuation = buffered[:, 2]
+            filters_moving = ((adjustment < 0) & (attenuation > 0)) | (
+                (adjustment > 0) & (attenuation < 15)
+            )
+
+            self.adjustment_dset[selection] = adjustment
+            self.attenuation_dset[selection] = attenuation
+            self.uid_dataset[selection] = frames + 1
+            self.filters_moving_flag_dataset[selection] = filters_moving
 
-        self.adjustment_dset.flush()
-        self.attenuation_dset.flush()
-        self.uid_dataset.flush()
-        self.filters_moving_flag_dataset.flush()
+            self.file.flush()
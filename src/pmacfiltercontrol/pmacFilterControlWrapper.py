@@ -1,20 +1,28 @@
 """The PMAC Filter Control wrapper."""
 
 import asyncio
-import codecs
-import json
+import atexit
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as dt
+from functools import partial
 from pathlib import Path
-from typing import Callable, Dict, Union
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
 
+import msgspec
+import numpy as np
+import orjson
 import zmq
 from aioca import caget, caput
-from softioc import builder
+from softioc import alarm, builder
 from softioc.builder import records
 
 from .hdfadapter import HDFAdapter
 from .zmqadapter import ZeroMQAdapter
 
+log = logging.getLogger(__name__)
+
 MODE = [
     "MANUAL",
     "CONTINUOUS",
@@ -49,32 +57,83 @@ ATTENUATION = [
     15,
 ]
 
+HIST_THRESHOLDS = ("High3", "High2", "High1", "Low2", "Low1")
+
+MODE_MANUAL = MODE.index("MANUAL")
+MODE_SINGLESHOT = MODE.index("SINGLESHOT")
+
+STATE_IDLE = 0
+STATE_SINGLESHOT_WAITING = 3
+STATE_SINGLESHOT_COMPLETE = 4
+
+NOT_CONNECTED = "Not connected to device. Try again once connection resumed."
+
 SHUTTER_CLOSED = "CLOSED"
 SHUTTER_OPEN = "OPEN"
 
+STATUS_KEY = b'"status"'
 
-def _if_connected(func: Callable) -> Callable:
-    """
-    Check connection decorator before function call.
+# FileRequest actions for the HDF5 writer task
+OPEN_FILE = "open_file"
+CLOSE_FILE = "close_file"
 
-    Decorator function to check if the wrapper is connected to the motion controller
-    device before calling the attached function.
+REQ_STATUS = b'{"command":"status"}'
+REQ_RESET = b'{"command":"reset"}'
+REQ_CLEAR_ERROR = b'{"command":"clear_error"}'
+REQ_SINGLESHOT = b'{"command":"singleshot"}'
 
-    Args:
-        func (Callable): Function to call if connected to device
+# Template for the mode configure command, filled with bytes % formatting
+CONFIGURE_MODE = b'{"command":"configure","params":{"mode":%d}}'
 
-    Returns:
-        Callable: The function to wrap func in.
+
+class FileRequest(NamedTuple):
+    """A request to the HDF5 writer task, queued in order with the received frames."""
+
+    action: str
+    file_path: str = ""
+    expected_frames: int = 0
+
+
+class Status(msgspec.Struct):
+    """Status reported by the PowerBrick program, decoded from a status reply."""
+
+    state: int
+    version: str
+    process_duration: float
+    process_period: float
+    last_received_frame: int
+    last_processed_frame: int
+    time_since_last_message: float
+    current_attenuation: int
+
+
+class StatusResponse(msgspec.Struct):
+    """Reply to a status request."""
+
+    status: Status
+
+
+STATUS_DECODER = msgspec.json.Decoder(StatusResponse)
+
+
+def install_uvloop() -> bool:
     """
+    Use uvloop for asyncio event loops, if it is installed.
 
-    def check_connection(*args, **kwargs) -> Union[Callable, bool]:
-        self = args[0]
-        if not self.connected:
-            print("Not connected to device. Try again once connection resumed.")
-            return True
-        return func(*args, *kwargs)
+    Sets the asyncio event loop policy, so must be called before the softioc
+    AsyncioDispatcher is created for the dispatcher's event loop to be a uvloop loop.
+
+    Returns:
+        bool: True if the uvloop policy was set, else False
+    """
+    try:
+        import uvloop
+    except ImportError:
+        log.info("uvloop not installed, using the default asyncio event loop.")
+        return False
 
-    return check_connection
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
 
 
 class Wrapper:
@@ -86,6 +145,18 @@ class Wrapper:
 
     POLL_PERIOD = 0.1
     RETRY_PERIOD = 5
+    FLUSH_PERIOD = 0.1
+    AUTOSAVE_PERIOD = 0.5
+
+    # Status fields that are set directly on a record: (status key, record attribute)
+    STATUS_RECORDS = (
+        ("process_duration", "process_duration"),
+        ("process_period", "process_period"),
+        ("last_received_frame", "last_frame_received"),
+        ("last_processed_frame", "last_frame_processed"),
+        ("time_since_last_message", "time_since_last_frame"),
+        ("current_attenuation", "current_attenuation"),
+    )
 
     def __init__(
         self,
@@ -125,12 +196,26 @@ class Wrapper:
         self.detector: str = detector
         self.motors: str = motors
 
+        self._hist_pvs: Dict[str, str] = {
+            threshold: f"{detector}:OD:SUM:Histogram:{threshold}"
+            for threshold in HIST_THRESHOLDS
+        }
+        self._shutter_pv: str = f"{motors}:SHUTTER"
+
         self.autosave_file: Path = Path(autosave_file_path)
 
-        self.status_recv: bool = True
+        self._status_recv: asyncio.Event = asyncio.Event()
         self.connected: bool = False
 
         self.h5f: HDFAdapter = HDFAdapter(hdf_file_path)
+        # Frames and file open/close requests for the HDF5 writer task
+        self._frame_queue: asyncio.Queue = asyncio.Queue()
+        # True from a file open request until the following close request, or until
+        # the open fails
+        self._file_requested: bool = False
+        # Warn once about frames received with no file open, until one is requested
+        self._dropped_frames_warned: bool = False
+        self._pending_params: Dict[str, Union[int, float, Dict[str, int]]] = {}
 
         self.pixel_count_thresholds = {
             "high1": 2,
@@ -169,6 +254,8 @@ class Wrapper:
             on_update=self._set_mode,
         )
         self.mode_rbv = builder.mbbIn("MODE_RBV", *MODE)
+        # Last mode set, mirrors MODE_RBV without a record read
+        self._mode: int = MODE_MANUAL
 
         self.reset = builder.boolOut("RESET", on_update=self._reset)
         self._reset_reset = records.calcout(
@@ -240,6 +327,11 @@ class Wrapper:
         )
         self._combine_file_path_and_name()
 
+        self.file_expected_frames = builder.longOut(
+            "FILE:EXPECTED_FRAMES",
+            initial_value=0,
+            DRVL=0,
+        )
         self.file_open = builder.aOut(
             "FILE:OPEN",
             on_update=self.open_file,
@@ -262,7 +354,7 @@ class Wrapper:
         )
 
         self._hist_thresholds: Dict[str, builder.aOut] = {}
-        for threshold in ("High3", "High2", "High1", "Low2", "Low1"):
+        for threshold in HIST_THRESHOLDS:
             hist = builder.aOut(
                 f"HIST:{threshold.upper()}",
                 on_update=lambda val, threshold=threshold: self._set_hist(
@@ -271,6 +363,10 @@ class Wrapper:
             )
             self._hist_thresholds[threshold] = hist
 
+        self._status_setters: Tuple[Tuple[str, Callable], ...] = tuple(
+            (key, getattr(self, attr).set) for key, attr in self.STATUS_RECORDS
+        )
+
         self.histogram_scale = builder.aOut(
             "HISTOGRAM:SCALE",
             initial_value=1.0,
@@ -279,9 +375,21 @@ class Wrapper:
         )
 
         self._autosave_dict: Dict[str, float] = {}
+        self._autosave_pending: bool = False
+        self.autosave_backup_file: Optional[Path] = None
+        # Contents last written to the autosave file, and autosave writes in progress
+        self._autosave_contents: bytes = b""
+        self._autosave_writes: int = 0
+        # A single worker, so that autosave writes happen in order
+        self._autosave_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="autosave"
+        )
+        self._autosave_exists: bool = self.autosave_file.exists()
+        # Don't lose changes made within AUTOSAVE_PERIOD of the IOC exiting
+        atexit.register(self.write_autosave)
 
-        if self.autosave_file.exists():
-            print("--- Autosave exists, restoring ---")
+        if self._autosave_exists:
+            log.info("--- Autosave exists, restoring ---")
             self._autosave_dict = self._get_autosave()
 
         self._generate_filter_pos_records(filter_set_total, filters_per_set)
@@ -295,7 +403,7 @@ class Wrapper:
         Send initial configuration settings on startup once a connection is
         established to the PowerBrick program.
         """
-        print("~ Initial Config: Waiting For Connection")
+        log.info("~ Initial Config: Waiting For Connection")
         while not self.connected:
             await asyncio.sleep(0.5)
 
@@ -307,7 +415,9 @@ class Wrapper:
             autosaved_filter_set: int = int(
                 self._autosave_dict[f"{self.device_name}:FILTER_SET"]
             )
-            print(f"~ Restoring with filter set: {FILTER_SET[autosaved_filter_set]}")
+            log.info(
+                "~ Restoring with filter set: %s", FILTER_SET[autosaved_filter_set]
+            )
             self.filter_set.set(autosaved_filter_set, process=False)
             self._set_filter_set(autosaved_filter_set)
         else:
@@ -317,44 +427,167 @@ class Wrapper:
         asyncio.run_coroutine_threadsafe(
             self._setup_hist_thresholds(), asyncio.get_event_loop()
         )
-        print("~ Initial Config: Complete")
+        log.info("~ Initial Config: Complete")
 
     def _get_autosave(self) -> Dict[str, float]:
         """Read the autosave file.
 
-        Opens the autosave file and reads the saved values into a dictionary.
+        Opens the autosave file and reads the saved values into a dictionary. Files
+        in the older format, with a "key value" pair on each line, are still read.
 
         Returns:
             Dict[str, float]: Dictionary of the values from the autosave file.
         """
+        contents = self.autosave_file.read_bytes()
+        if contents.lstrip().startswith(b"{"):
+            return orjson.loads(contents)
+
         autosave_dict = {}
-        with self.autosave_file.open("r") as autosave_file:
-            for line in autosave_file:
-                line_ = line.strip().split(" ")
-                autosave_dict[line_[0]] = float(line_[1])
+        for line in contents.decode().splitlines():
+            line_ = line.strip().split(" ")
+            autosave_dict[line_[0]] = float(line_[1])
         return autosave_dict
 
     def write_autosave(self) -> None:
         """
-        Write to autosave files.
+        Write any pending autosave changes to the autosave files immediately.
+
+        Write the current autosave dictionary to the autosave files as a JSON
+        object if a queued write has not happened yet. The hourly backup file is
+        written by the first save in each hour.
+        """
+        if self._autosave_pending:
+            self._autosave_pending = False
+            contents, autosave_files = self._prepare_autosave()
+            if self._write_autosave_files(contents, autosave_files):
+                self._autosave_written(contents, autosave_files)
 
-        Write the current autosave dictionary to the autosave files, with a
-        ' ' delimiter between key/value and each separated by a newline.
+    def _prepare_autosave(self) -> Tuple[bytes, List[Path]]:
         """
+        Serialise the autosave dictionary and select the autosave files to write.
+
+        No files are selected if nothing has changed since the last successful write,
+        unless another write is still in progress.
+
+        Returns:
+            Tuple[bytes, List[Path]]: Autosave file contents and the files to write
+        """
+        # Values read back from CA are float subclasses, which orjson only
+        # serialises through the default hook
+        contents = orjson.dumps(
+            self._autosave_dict,
+            default=float,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+        )
+        if contents == self._autosave_contents and not self._autosave_writes:
+            return contents, []
+
         parent_dir = self.autosave_file.parent
         self.autosave_datetime: dt = dt.now()
-        self.autosave_backup_file: Path = parent_dir.joinpath(
+        backup_file = parent_dir.joinpath(
             f"autosave-{self.autosave_datetime:%Y%m%d-%H}.txt"
         )
 
-        for autosave_file in [self.autosave_file, self.autosave_backup_file]:
-            autosave_file.write_text(
-                "\n".join(
-                    f"{key} {value}" for key, value in self._autosave_dict.items()
-                )
+        autosave_files = [self.autosave_file]
+        if backup_file != self.autosave_backup_file:
+            autosave_files.append(backup_file)
+
+        return contents, autosave_files
+
+    def _autosave_written(self, contents: bytes, autosave_files: List[Path]) -> None:
+        """
+        Record a successful write of the autosave files.
+
+        Args:
+            contents (bytes): Serialised autosave dictionary that was written
+            autosave_files (List[Path]): Autosave files that were written
+        """
+        self._autosave_contents = contents
+        if len(autosave_files) > 1:
+            self.autosave_backup_file = autosave_files[-1]
+
+    @staticmethod
+    def _write_autosave_files(contents: bytes, autosave_files: List[Path]) -> bool:
+        """
+        Write serialised autosave contents to the autosave files.
+
+        Each file is written to a temporary file and synced to disk before being
+        moved into place, so a partially written autosave file is never left behind.
+
+        Args:
+            contents (bytes): Serialised autosave dictionary
+            autosave_files (List[Path]): Autosave files to write
+
+        Returns:
+            bool: True if every file was written, else False
+        """
+        success = True
+        for autosave_file in autosave_files:
+            temp_file = autosave_file.with_name(f".{autosave_file.name}.tmp")
+            try:
+                with temp_file.open("wb") as f:
+                    f.write(contents)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, autosave_file)
+            except OSError as e:
+                log.error("Failed to write %s: %s", autosave_file, e)
+                success = False
+            else:
+                log.debug("Updated %s with new positions.", autosave_file.name)
+
+        return success
+
+    def _queue_autosave(self) -> None:
+        """
+        Queue a write of the autosave files.
+
+        Changes made within AUTOSAVE_PERIOD of each other are written together.
+        """
+        if not self._autosave_pending:
+            self._autosave_pending = True
+            asyncio.get_event_loop().call_later(
+                self.AUTOSAVE_PERIOD, self._write_pending_autosave
+            )
+
+    def _write_pending_autosave(self) -> None:
+        """
+        Write the autosave changes made since the files were last written.
+
+        The autosave dictionary is serialised on the event loop, and the files are
+        written by the autosave worker thread so that disk I/O does not block it.
+        """
+        self._autosave_pending = False
+        contents, autosave_files = self._prepare_autosave()
+        if autosave_files:
+            self._autosave_writes += 1
+            future = asyncio.get_event_loop().run_in_executor(
+                self._autosave_executor,
+                self._write_autosave_files,
+                contents,
+                autosave_files,
             )
+            future.add_done_callback(
+                partial(self._autosave_write_done, contents, autosave_files)
+            )
+
+    def _autosave_write_done(
+        self, contents: bytes, autosave_files: List[Path], future: asyncio.Future
+    ) -> None:
+        """
+        Handle the completion of an autosave write by the autosave worker thread.
+
+        The write is only recorded if it succeeded, so that a failed write is
+        retried by the next autosave even if nothing has changed.
 
-            print(f"Updated {autosave_file.name} with new positions.")
+        Args:
+            contents (bytes): Serialised autosave dictionary
+            autosave_files (List[Path]): Autosave files written
+            future (asyncio.Future): Result of the write
+        """
+        self._autosave_writes -= 1
+        if future.result():
+            self._autosave_written(contents, autosave_files)
 
     def _generate_filter_pos_records(
         self,
@@ -374,6 +607,14 @@ class Wrapper:
         self.filter_sets_in: Dict[str, Dict[str, builder.aOut]] = {}
         self.filter_sets_out: Dict[str, Dict[str, builder.aOut]] = {}
 
+        self._filter_labels: Tuple[str, ...] = tuple(
+            f"filter{j}" for j in range(1, filters_per_set + 1)
+        )
+
+        # Position values mirrored from the records, indexed [filter set, filter]
+        self._in_positions = np.empty((filter_set_total, filters_per_set))
+        self._out_positions = np.empty((filter_set_total, filters_per_set))
+
         for i in range(1, filter_set_total + 1):
             filter_set_key = f"filter_set_{i}"
             self.filter_sets_in[filter_set_key] = {}
@@ -385,36 +626,38 @@ class Wrapper:
 
                 in_value: float = (
                     self._autosave_dict[f"{self.device_name}:{IN_KEY}"]
-                    if self.autosave_file.exists()
+                    if self._autosave_exists
                     else 100.0
                 )
                 in_record: builder.aOut = builder.aOut(
                     IN_KEY,
                     initial_value=in_value,
-                    on_update=lambda val, i=i, in_key=IN_KEY: self._set_pos(
-                        i, in_key, val
+                    on_update=lambda val, i=i, j=j, in_key=IN_KEY: self._update_pos(
+                        self._in_positions, i, j, in_key, val
                     ),
                 )
 
                 out_value: float = (
                     self._autosave_dict[f"{self.device_name}:{OUT_KEY}"]
-                    if self.autosave_file.exists()
+                    if self._autosave_exists
                     else 0.0
                 )
                 out_record: builder.aOut = builder.aOut(
                     OUT_KEY,
                     initial_value=out_value,
-                    on_update=lambda val, i=i, out_key=OUT_KEY: self._set_pos(
-                        i, out_key, val
+                    on_update=lambda val, i=i, j=j, out_key=OUT_KEY: self._update_pos(
+                        self._out_positions, i, j, out_key, val
                     ),
                 )
 
-                if not self.autosave_file.exists():
+                if not self._autosave_exists:
                     self._autosave_dict[in_record.name] = in_value
                     self._autosave_dict[out_record.name] = out_value
 
                 self.filter_sets_in[filter_set_key][IN_KEY] = in_record
                 self.filter_sets_out[filter_set_key][OUT_KEY] = out_record
+                self._in_positions[i - 1, j - 1] = in_value
+                self._out_positions[i - 1, j - 1] = out_value
 
     def _generate_shutter_records(self) -> None:
         """
@@ -428,12 +671,12 @@ class Wrapper:
 
         shutter_open_pos = (
             self._autosave_dict[f"{self.device_name}:SHUTTER:OPEN"]
-            if self.autosave_file.exists()
+            if self._autosave_exists
             else 0
         )
         shutter_closed_pos = (
             self._autosave_dict[f"{self.device_name}:SHUTTER:CLOSED"]
-            if self.autosave_file.exists()
+            if self._autosave_exists
             else 500
         )
 
@@ -448,7 +691,7 @@ class Wrapper:
             on_update=lambda val: self._set_shutter_pos(val, SHUTTER_CLOSED),
         )
 
-        if not self.autosave_file.exists():
+        if not self._autosave_exists:
             self._autosave_dict[f"{self.device_name}:SHUTTER:OPEN"] = 0.0
             self._autosave_dict[f"{self.device_name}:SHUTTER:CLOSED"] = 500.0
 
@@ -461,39 +704,39 @@ class Wrapper:
         self.extreme_high_threshold = builder.aOut(
             "HIGH:THRESHOLD:EXTREME",
             initial_value=100,
-            on_update=self._set_extreme_high_threshold,
+            on_update=partial(self._set_threshold, "high3"),
         )
         self.upper_high_threshold = builder.aOut(
             "HIGH:THRESHOLD:UPPER",
             initial_value=2,
-            on_update=self._set_upper_high_threshold,
+            on_update=partial(self._set_threshold, "high2"),
         )
         self.lower_high_threshold = builder.aOut(
             "HIGH:THRESHOLD:LOWER",
             initial_value=2,
-            on_update=self._set_lower_high_threshold,
+            on_update=partial(self._set_threshold, "high1"),
         )
         self.upper_low_threshold = builder.aOut(
             "LOW:THRESHOLD:UPPER",
             initial_value=2,
-            on_update=self._set_upper_low_threshold,
+            on_update=partial(self._set_threshold, "low2"),
         )
         self.lower_low_threshold = builder.aOut(
             "LOW:THRESHOLD:LOWER",
             initial_value=2,
-            on_update=self._set_lower_low_threshold,
+            on_update=partial(self._set_threshold, "low1"),
         )
 
-        pixel_threshold_records = [
-            self.extreme_high_threshold,
-            self.upper_high_threshold,
-            self.lower_high_threshold,
-            self.upper_low_threshold,
-            self.lower_low_threshold,
-        ]
+        self._pixel_threshold_records: Dict[str, builder.aOut] = {
+            "high3": self.extreme_high_threshold,
+            "high2": self.upper_high_threshold,
+            "high1": self.lower_high_threshold,
+            "low2": self.upper_low_threshold,
+            "low1": self.lower_low_threshold,
+        }
 
-        for record in pixel_threshold_records:
-            if not self.autosave_file.exists():
+        for record in self._pixel_threshold_records.values():
+            if not self._autosave_exists:
                 self._autosave_dict[record.name] = record.get()
             else:
                 record.set(self._autosave_dict[record.name])
@@ -505,25 +748,19 @@ class Wrapper:
         Setup the values for the histogram thresholds based on Odin records if no
         autosave exists.
         """
-        self._hist_threshold_values: Dict[str, float] = {
-            "High3": self._autosave_dict["High3"]
-            if "High3" in self._autosave_dict.keys()
-            else await caget(f"{self.detector}:OD:SUM:Histogram:High3"),
-            "High2": int(self._autosave_dict["High2"])
-            if "High2" in self._autosave_dict.keys()
-            else await caget(f"{self.detector}:OD:SUM:Histogram:High2"),
-            "High1": int(self._autosave_dict["High1"])
-            if "High1" in self._autosave_dict.keys()
-            else await caget(f"{self.detector}:OD:SUM:Histogram:High1"),
-            "Low1": int(self._autosave_dict["Low1"])
-            if "Low1" in self._autosave_dict.keys()
-            else await caget(f"{self.detector}:OD:SUM:Histogram:Low1"),
-            "Low2": int(self._autosave_dict["Low2"])
-            if "Low2" in self._autosave_dict.keys()
-            else await caget(f"{self.detector}:OD:SUM:Histogram:Low2"),
+        hist_threshold_values: Dict[str, float] = {
+            threshold: self._autosave_dict[threshold]
+            for threshold in HIST_THRESHOLDS
+            if threshold in self._autosave_dict
         }
 
-        for key, value in self._hist_threshold_values.items():
+        # Fetch any values not restored from autosave in a single concurrent caget
+        missing = [t for t in HIST_THRESHOLDS if t not in hist_threshold_values]
+        if missing:
+            values = await caget([self._hist_pvs[t] for t in missing])
+            hist_threshold_values.update(zip(missing, values))
+
+        for key, value in hist_threshold_values.items():
             self._autosave_dict[key] = value
             self._hist_thresholds[key].set(value, process=True)
 
@@ -533,15 +770,9 @@ class Wrapper:
 
         Fetch the current histogram threshold values from Odin.
         """
-        non_scaled_hist_thresholds: Dict[str, float] = {
-            "High3": await caget(f"{self.detector}:OD:SUM:Histogram:High3"),
-            "High2": await caget(f"{self.detector}:OD:SUM:Histogram:High2"),
-            "High1": await caget(f"{self.detector}:OD:SUM:Histogram:High1"),
-            "Low1": await caget(f"{self.detector}:OD:SUM:Histogram:Low1"),
-            "Low2": await caget(f"{self.detector}:OD:SUM:Histogram:Low2"),
-        }
+        values = await caget([self._hist_pvs[t] for t in HIST_THRESHOLDS])
 
-        for key, value in non_scaled_hist_thresholds.items():
+        for key, value in zip(HIST_THRESHOLDS, values):
             self._autosave_dict[key] = value
 
     async def _set_hist_thresholds(self, thresholds: Dict[str, int]) -> None:
@@ -553,15 +784,15 @@ class Wrapper:
         """
         for threshold, value in thresholds.items():
             await caput(
-                f"{self.detector}:OD:SUM:Histogram:{threshold}",
+                self._hist_pvs[threshold],
                 value,
             )
 
-        self.write_autosave()
+        self._queue_autosave()
 
     async def run_forever(self) -> None:
         """Run asyncio background tasks until program exit."""
-        print("Connecting to ZMQ stream...")
+        log.info("Connecting to ZMQ stream...")
 
         asyncio.run_coroutine_threadsafe(
             self._send_initial_config(), asyncio.get_running_loop()
@@ -574,6 +805,7 @@ class Wrapper:
                 self.zmq_stream.run_forever(),
                 self.event_stream.run_forever(),
                 self._query_status(),
+                self._frame_writer(),
             ]
         )
 
@@ -588,21 +820,27 @@ class Wrapper:
         """
         while True:
             if not zmq_stream.running:
-                print("- Command stream disconnected. Waiting for reconnect...")
-                while not zmq_stream.running:
-                    await asyncio.sleep(1)
-                print("- Command stream (re)connected.")
+                log.warning("- Command stream disconnected. Waiting for reconnect...")
+                await zmq_stream.running_event.wait()
+                log.info("- Command stream (re)connected.")
             else:
                 resp: bytes = await zmq_stream.get_response()
-                if resp is not None:
-                    resp_json = json.loads(resp)
-
-                    if "status" in resp_json:
-                        if not self.connected:
-                            self.connected = True
-                        status = resp_json["status"]
-                        self._handle_status(status)
-                        self.status_recv = True
+                # If replies have backed up, only the latest status needs decoding
+                for queued_resp in zmq_stream.get_queued_responses():
+                    if STATUS_KEY in queued_resp:
+                        resp = queued_resp
+                if resp is not None and STATUS_KEY in resp:
+                    try:
+                        status = STATUS_DECODER.decode(resp).status
+                    except msgspec.DecodeError as e:
+                        # Includes ValidationError, e.g. a missing or mistyped field
+                        log.error("Invalid status reply %r: %s", resp, e)
+                        continue
+                    if not self.connected:
+                        log.info("Connected and status received.")
+                        self.connected = True
+                    self._handle_status(status)
+                    self._status_recv.set()
 
     async def monitor_event_stream(self, zmq_stream: ZeroMQAdapter) -> None:
         """
@@ -615,124 +853,214 @@ class Wrapper:
         """
         while True:
             if not zmq_stream.running:
-                print("- Event stream disconnected. Waiting for reconnect...")
-                while not zmq_stream.running:
-                    await asyncio.sleep(1)
-                print("- Event stream (re)connected.")
+                log.warning("- Event stream disconnected. Waiting for reconnect...")
+                await zmq_stream.running_event.wait()
+                log.info("- Event stream (re)connected.")
             else:
                 resp: bytes = await zmq_stream.get_response()
-                if resp is not None:
-                    resp_json = json.loads(resp)
-
-                    if "frame_number" in resp_json:
-                        if self.h5f.file_open:
-                            try:
-                                self.h5f._write_to_file(resp_json)
-                            except RuntimeError as e:
-                                print(e)
-                        else:
-                            print("WARNING: HDF5 file not open and frame received.")
-
-    @_if_connected
+                # Handle any other events received in the same burst without waiting
+                for resp in [resp, *zmq_stream.get_queued_responses()]:
+                    if resp is not None:
+                        resp_json = orjson.loads(resp)
+
+                        if "frame_number" in resp_json:
+                            if self._file_requested:
+                                self._frame_queue.put_nowait(resp_json)
+                            elif not self._dropped_frames_warned:
+                                self._dropped_frames_warned = True
+                                log.warning("HDF5 file not open and frame received.")
+
+    async def _frame_writer(self) -> None:
+        """
+        HDF5 writer loop.
+
+        Buffer frames received on the event stream and write them to the HDF5 file in
+        batches, in a worker thread so that file I/O does not block the event loop. The
+        buffer is written once full, or FLUSH_PERIOD after the first frame in it was
+        received.
+
+        The file is opened and closed by this loop too, in order with the frames, so
+        every frame received while a file is open is written before it is closed.
+        """
+        loop = asyncio.get_running_loop()
+        flush_time = loop.time()
+        while True:
+            buffer_full = False
+            request: Optional[FileRequest] = None
+            try:
+                if self.h5f._buffered_frames:
+                    item = await asyncio.wait_for(
+                        self._frame_queue.get(),
+                        timeout=max(flush_time - loop.time(), 0),
+                    )
+                else:
+                    # Nothing to write, so wait for the next frame or request
+                    item = await self._frame_queue.get()
+                    flush_time = loop.time() + self.FLUSH_PERIOD
+                # Take the rest of the burst without a wait per frame
+                while True:
+                    if isinstance(item, FileRequest):
+                        request = item
+                        break
+                    if self.h5f.file_open:
+                        buffer_full = self.h5f._buffer_frame(item)
+                    if buffer_full or self._frame_queue.empty():
+                        break
+                    item = self._frame_queue.get_nowait()
+            except asyncio.TimeoutError:
+                pass
+
+            if request is not None or buffer_full or loop.time() >= flush_time:
+                frames = self.h5f._take_buffered_frames()
+                if frames is not None:
+                    try:
+                        await loop.run_in_executor(None, self.h5f._write_frames, frames)
+                    except Exception as e:
+                        log.error("Failed to write frames to HDF5 file: %s", e)
+
+            if request is None:
+                continue
+            if request.action == OPEN_FILE:
+                try:
+                    await loop.run_in_executor(
+                        None,
+                        self.h5f._open_file,
+                        request.expected_frames,
+                        request.file_path,
+                    )
+                except Exception as e:
+                    log.error("Failed to open HDF5 file: %s", e)
+                if not self.h5f.file_open:
+                    # Stop queueing frames that cannot be written
+                    self._file_requested = False
+                    self.file_open.set(0, process=False)
+            elif request.action == CLOSE_FILE:
+                try:
+                    await loop.run_in_executor(None, self.h5f._close_file)
+                except Exception as e:
+                    log.error("Failed to close HDF5 file: %s", e)
+
     def open_file(self, _: int) -> None:
         """
         File open function.
 
-        Opens the HDF5 attenuation file.
+        Requests the HDF5 writer task to open the HDF5 attenuation file.
 
         Args:
             _ (int): EPICS record processing value
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         if _ == 1:
-            self.h5f._open_file()
+            self._file_requested = True
+            self._dropped_frames_warned = False
+            # Use the current path, even if it changes before the file is opened
+            self._frame_queue.put_nowait(
+                FileRequest(
+                    OPEN_FILE, self.h5f.file_path, self.file_expected_frames.get()
+                )
+            )
 
         if self.file_close.get() != 0:
             self.file_close.set(0, process=False)
 
-    @_if_connected
     def close_file(self, _: int) -> None:
         """
         File close function.
 
-        Closes the HDF5 attenuation file.
+        Requests the HDF5 writer task to close the HDF5 attenuation file, once the
+        frames already received have been written to it.
 
         Args:
             _ (int): EPICS record processing value
         """
-        if _ == 1:
-            self.h5f._close_file()
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
+        if _ == 1 and self._file_requested:
+            self._file_requested = False
+            self._frame_queue.put_nowait(FileRequest(CLOSE_FILE))
 
         if self.file_open.get() != 0:
             self.file_open.set(0, process=False)
 
-    def _req_status(self) -> None:
-        """Send status request command to PowerBrick program."""
-        req_status = b'{"command":"status"}'
-        self._send_message(req_status)
-
     async def _query_status(self) -> None:
-        """Query the status of the PowerBrick program every 0.1s."""
+        """
+        Query the status of the PowerBrick program.
+
+        A new status request is only sent once the previous one has been answered,
+        at most every POLL_PERIOD. If no response arrives within RETRY_PERIOD the
+        device is flagged as disconnected and the request is re-sent.
+        """
         while True:
             if not self.zmq_stream.running:
-                print("Zmq stream not running. waiting...")
-                await asyncio.sleep(1)
-            else:
-                if self.status_recv:
-                    self.status_recv = False
-                    self._req_status()
-                else:
-                    print("No status response. Waiting for reconnect...")
+                log.debug("Zmq stream not running. waiting...")
+                await self.zmq_stream.running_event.wait()
+
+            self._status_recv.clear()
+            self._send_message(REQ_STATUS)
+            try:
+                await asyncio.wait_for(
+                    self._status_recv.wait(), timeout=self.RETRY_PERIOD
+                )
+            except asyncio.TimeoutError:
+                if self.connected:
+                    log.warning("No status response. Waiting for reconnect...")
                     self.connected = False
-                    while not self.status_recv:
-                        await asyncio.sleep(1)
-                        self._req_status()
-                    print("Reconnected and status recieved.")
-                await asyncio.sleep(0.1)
+                continue
+
+            await asyncio.sleep(self.POLL_PERIOD)
 
-    def _handle_status(self, status: Dict[str, int]) -> None:
+    def _handle_status(self, status: Status) -> None:
         """
         Handle status returned from PowerBrick program.
 
         Args:
-            status (Dict[str, int]): Status dictionary returned from PowerBrick program
+            status (Status): Status decoded from the PowerBrick program reply
         """
-        state = status["state"]
+        state = status.state
         if state < 0:
             state = 16 + state
         self.state.set(state)
 
-        version = status["version"]
-        self.version.set(str(version))
-
-        process_duration = status["process_duration"]
-        self.process_duration.set(process_duration)
+        self.version.set(status.version)
 
-        process_period = status["process_period"]
-        self.process_period.set(process_period)
+        for key, set_record in self._status_setters:
+            set_record(getattr(status, key))
 
-        last_received_frame = status["last_received_frame"]
-        self.last_frame_received.set(last_received_frame)
-
-        last_processed_frame = status["last_processed_frame"]
-        self.last_frame_processed.set(last_processed_frame)
-
-        time_since_last_frame = status["time_since_last_message"]
-        self.time_since_last_frame.set(time_since_last_frame)
         # Check that at least 1 frame has been received before timing out
-        if time_since_last_frame > self.timeout_rbv.get() and last_received_frame > 1:
+        if (
+            status.time_since_last_message > self.timeout_rbv.get()
+            and status.last_received_frame > 1
+        ):
             self.close_file(1)
 
-        current_attenuation = status["current_attenuation"]
-        self.current_attenuation.set(current_attenuation)
-
-    def _send_message(self, message: bytes) -> None:
+    def _send_message(self, message: bytes) -> bool:
         """
         Send ZMQ stream message.
 
+        Any configure parameters waiting to be sent are sent first, so that commands
+        reach the PowerBrick program in the order they were made. If the message is
+        rejected because the send queue is full, STATE is put into alarm until the
+        next status is received.
+
         Args:
             message (bytes): Message to send over the zmq stream
+
+        Returns:
+            bool: True if the message was queued to send
         """
-        self.zmq_stream.send_message([message])
+        if self._pending_params:
+            self._send_pending_params()
+        if not self.zmq_stream.send_message([message]):
+            self.state.set(
+                self.state.get(), severity=alarm.MAJOR_ALARM, alarm=alarm.COMM_ALARM
+            )
+            return False
+        return True
 
     def _configure_param(
         self, param: Dict[str, Union[int, float, Dict[str, int]]]
@@ -740,13 +1068,28 @@ class Wrapper:
         """
         Configure PowerBrick program parameter.
 
+        Parameters configured within the same event loop iteration are sent together
+        in a single configure command.
+
         Args:
             param (Dict[str, Union[int, float, Dict[str, int]]]): Parameter to configure
         """
-        configure = json.dumps({"command": "configure", "params": param})
-        self._send_message(codecs.encode(configure, "utf-8"))
+        if not self._pending_params:
+            asyncio.get_event_loop().call_soon(self._send_pending_params)
+        self._pending_params.update(param)
+
+    def _send_pending_params(self) -> None:
+        """Send the parameters configured since they were last sent, if any."""
+        if not self._pending_params:
+            return
+
+        params, self._pending_params = self._pending_params, {}
+        configure = orjson.dumps(
+            {"command": "configure", "params": params},
+            option=orjson.OPT_SERIALIZE_NUMPY,
+        )
+        self._send_message(configure)
 
-    @_if_connected
     def _set_mode(self, mode: int) -> None:
         """
         Set mode of PMAC Filter Controller.
@@ -756,17 +1099,22 @@ class Wrapper:
         Args:
             mode (int): Mode to set
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         # Set mode for PFC
-        self._configure_param({"mode": mode})
+        if not self._send_message(CONFIGURE_MODE % mode):
+            return
 
+        self._mode = mode
         self.mode_rbv.set(mode)
 
         self.close_file(1)
 
-        if mode == 0:
+        if mode == MODE_MANUAL:
             self.attenuation.set(15)
 
-    @_if_connected
     def _set_manual_attenuation(self, attenuation: int) -> None:
         """
         Set manual attenuation of PMAC Filter Controller.
@@ -774,14 +1122,17 @@ class Wrapper:
         Args:
             attenuation (int): Attenuation to set
         """
-        if self.state.get() == 0 and self.mode_rbv.get() == 0:
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
+        if self.state.get() == STATE_IDLE and self._mode == MODE_MANUAL:
             # Set manual attenuation for PFC
             self._configure_param({"attenuation": attenuation})
 
         else:
-            print("ERROR: Must be in MANUAL mode and IDLE state.")
+            log.error("Must be in MANUAL mode and IDLE state.")
 
-    @_if_connected
     async def _reset(self, _: int) -> None:
         """
         Reset frame number of PMAC Filter Controller.
@@ -789,11 +1140,13 @@ class Wrapper:
         Args:
             _ (int): EPICS record processing value
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         if _ == 1:
-            reset = b'{"command":"reset"}'
-            self._send_message(reset)
+            self._send_message(REQ_RESET)
 
-    @_if_connected
     def _set_timeout(self, timeout: int) -> None:
         """
         Set timeout of PMAC Filter Controller.
@@ -801,11 +1154,14 @@ class Wrapper:
         Args:
             timeout (int): Timeout to set
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         self._configure_param({"timeout": timeout})
 
         self.timeout_rbv.set(timeout)
 
-    @_if_connected
     async def _clear_error(self, _: int) -> None:
         """
         Clear error state of PMAC Filter Controller.
@@ -813,11 +1169,13 @@ class Wrapper:
         Args:
             _ (int): EPICS record processing value
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         if _ == 1:
-            clear_error = json.dumps({"command": "clear_error"})
-            self._send_message(codecs.encode(clear_error, "utf-8"))
+            self._send_message(REQ_CLEAR_ERROR)
 
-    @_if_connected
     async def _start_singleshot(self, _: int) -> None:
         """
         Trigger Singleshot logic in PMAC Filter Controller.
@@ -825,19 +1183,22 @@ class Wrapper:
         Args:
             _ (int): EPICS record processing value
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         if _ == 1:
+            state = self.state.get()
             if (
-                self.state.get() == 3 or self.state.get() == 4
-            ) and self.mode_rbv.get() == 2:
-                start_singleshot = json.dumps({"command": "singleshot"})
-                self._send_message(codecs.encode(start_singleshot, "utf-8"))
+                state == STATE_SINGLESHOT_WAITING or state == STATE_SINGLESHOT_COMPLETE
+            ) and self._mode == MODE_SINGLESHOT:
+                self._send_message(REQ_SINGLESHOT)
             else:
-                print(
-                    "ERROR: Must be in SINGLESHOT mode, and in \
-                        SINGLESHOT_WAITING/COMPLETE state."
+                log.error(
+                    "Must be in SINGLESHOT mode, and in "
+                    "SINGLESHOT_WAITING/COMPLETE state."
                 )
 
-    @_if_connected
     async def _set_shutter(self, shutter_state: int) -> None:
         """
         Set state of the fast shutter.
@@ -845,12 +1206,16 @@ class Wrapper:
         Args:
             shutter_state (int): The state to set
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         if shutter_state == 0:  # SHUTTER_CLOSED
             pos = self.shutter_pos_closed.get()
         else:
             pos = self.shutter_pos_open.get()
 
-        await caput(f"{self.motors}:SHUTTER", pos, wait=False, throw=False)
+        await caput(self._shutter_pv, pos, wait=False, throw=False)
 
     def _set_shutter_pos(self, val: float, shutter_state: str) -> None:
         """
@@ -863,104 +1228,53 @@ class Wrapper:
         if shutter_state == SHUTTER_CLOSED:
             self._configure_param({"shutter_closed_position": val})
 
-        current_shutter_state = "CLOSED" if self.shutter.get() == 0 else "OPEN"
-        if current_shutter_state == shutter_state:
-            self._set_shutter(shutter_state)
+        # Move the shutter to the new position if it is already in this state
+        shutter_value = 0 if shutter_state == SHUTTER_CLOSED else 1
+        if self.shutter.get() == shutter_value:
+            asyncio.ensure_future(self._set_shutter(shutter_value))
 
         self._autosave_dict[f"{self.device_name}:SHUTTER:{shutter_state}"] = val
 
-        self.write_autosave()
+        self._queue_autosave()
 
-    @_if_connected
     def _set_thresholds(self) -> None:
         """Set pixel threshold values for PMAC Filter Controller."""
-        self._configure_param({"pixel_count_thresholds": self.pixel_count_thresholds})
-
-        self.write_autosave()
-
-    @_if_connected
-    def _set_extreme_high_threshold(self, threshold: int) -> None:
-        """
-        Set extreme high pixel threshold value.
-
-        Args:
-            threshold (int): New threshold value
-        """
-        if threshold != self.pixel_count_thresholds["high3"]:
-            self.pixel_count_thresholds["high3"] = threshold
-
-            self._autosave_dict[self.extreme_high_threshold.name] = threshold
-            self._set_thresholds()
-
-    @_if_connected
-    def _set_upper_high_threshold(self, threshold: int) -> None:
-        """
-        Set upper high pixel threshold value.
-
-        Args:
-            threshold (int): New threshold value
-        """
-        if threshold != self.pixel_count_thresholds["high2"]:
-            self.pixel_count_thresholds["high2"] = threshold
-
-            self._autosave_dict[self.upper_high_threshold.name] = threshold
-            self._set_thresholds()
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
 
-        else:
-            print(f"High 2 is already at value {threshold}.")
+        self._configure_param(
+            {"pixel_count_thresholds": dict(self.pixel_count_thresholds)}
+        )
 
-    @_if_connected
-    def _set_lower_high_threshold(self, threshold: int) -> None:
-        """
-        Set lower high pixel threshold value.
+        self._queue_autosave()
 
-        Args:
-            threshold (int): New threshold value
+    def _set_threshold(self, key: str, threshold: int) -> None:
         """
-        if threshold != self.pixel_count_thresholds["high1"]:
-            self.pixel_count_thresholds["high1"] = threshold
-
-            self._autosave_dict[self.lower_high_threshold.name] = threshold
-            self._set_thresholds()
+        Set a pixel threshold value.
 
-        else:
-            print(f"High 1 is already at value {threshold}.")
-
-    @_if_connected
-    def _set_upper_low_threshold(self, threshold: int) -> None:
-        """
-        Set upper low pixel threshold value.
+        Changes made within the same event loop iteration are sent together.
 
         Args:
+            key (str): Pixel count threshold to set, e.g. "high2"
             threshold (int): New threshold value
         """
-        if threshold != self.pixel_count_thresholds["low2"]:
-            self.pixel_count_thresholds["low2"] = threshold
-
-            self._autosave_dict[self.upper_low_threshold.name] = threshold
-            self._set_thresholds()
-
-        else:
-            print(f"Low 2 is already at value {threshold}.")
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
 
-    @_if_connected
-    def _set_lower_low_threshold(self, threshold: int) -> None:
-        """
-        Set lower low pixel threshold value.
+        # Thresholds are pixel counts, sent as integers
+        threshold = int(threshold)
+        if threshold != self.pixel_count_thresholds[key]:
+            self.pixel_count_thresholds[key] = threshold
 
-        Args:
-            threshold (int): New threshold value
-        """
-        if threshold != self.pixel_count_thresholds["low1"]:
-            self.pixel_count_thresholds["low1"] = threshold
+            record = self._pixel_threshold_records[key]
+            self._autosave_dict[record.name] = threshold
 
-            self._autosave_dict[self.lower_low_threshold.name] = threshold
             self._set_thresholds()
-
         else:
-            print(f"Low 1 is already at value {threshold}.")
+            log.debug("%s is already at value %s.", key, threshold)
 
-    @_if_connected
     async def _set_hist(self, hist_name: str, hist_val: int) -> None:
         """
         Set histogram threshold value.
@@ -969,16 +1283,19 @@ class Wrapper:
             hist_name (str): Name of the histogram threshold to set
             hist_val (int): Value to set the histogram threshold to
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         self._hist_thresholds[hist_name] = hist_val
         self._autosave_dict[hist_name] = hist_val
         await caput(
-            f"{self.detector}:OD:SUM:Histogram:{hist_name}",
+            self._hist_pvs[hist_name],
             hist_val,
         )
 
-        self.write_autosave()
+        self._queue_autosave()
 
-    @_if_connected
     async def _set_histogram_scale(self, scale: float) -> None:
         """
         Scale the histogram values by a factor.
@@ -986,6 +1303,10 @@ class Wrapper:
         Args:
             scale (float): Scale factor
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         new_thresholds = self._hist_thresholds
 
         if scale != 1.0:
@@ -998,7 +1319,6 @@ class Wrapper:
 
         await self._set_hist_thresholds(new_thresholds)
 
-    @_if_connected
     def _set_filter_set(self, filter_set_num: int) -> None:
         """
         Set filter set positions based on the filter set.
@@ -1006,38 +1326,52 @@ class Wrapper:
         Args:
             filter_set_num (int): Filter set to set positions for
         """
-        in_positions = [
-            x.get()
-            for x in self.filter_sets_in[f"filter_set_{filter_set_num+1}"].values()
-        ]
-        out_positions = [
-            x.get()
-            for x in self.filter_sets_out[f"filter_set_{filter_set_num+1}"].values()
-        ]
-
-        in_pos = {}
-        for id, pos in enumerate(in_positions):
-            in_pos[f"filter{id+1}"] = pos
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
 
-        out_pos = {}
-        for id, pos in enumerate(out_positions):
-            out_pos[f"filter{id+1}"] = pos
+        in_pos = dict(
+            zip(self._filter_labels, self._in_positions[filter_set_num].tolist())
+        )
+        out_pos = dict(
+            zip(self._filter_labels, self._out_positions[filter_set_num].tolist())
+        )
 
         # Set filter set positions for PFC
         self._configure_param({"in_positions": in_pos, "out_positions": out_pos})
 
         self.filter_set_rbv.set(filter_set_num)
 
-        if self.mode.get() > 0:
-            self._set_mode(0)
-            self.mode.set(0, process=False)
+        if self.mode.get() != MODE_MANUAL:
+            self._set_mode(MODE_MANUAL)
+            self.mode.set(MODE_MANUAL, process=False)
         else:
             self._set_manual_attenuation(15)
 
         self._autosave_dict[f"{self.device_name}:FILTER_SET"] = filter_set_num
-        self.write_autosave()
+        self._queue_autosave()
+
+    def _update_pos(
+        self,
+        positions: np.ndarray,
+        filter_set: int,
+        filter_num: int,
+        in_out_key: str,
+        val: float,
+    ) -> None:
+        """
+        Update the stored position of a filter and apply it.
+
+        Args:
+            positions (np.ndarray): In or out position array the filter belongs to
+            filter_set (int): Filter set of the filter
+            filter_num (int): Number of the filter in the filter set
+            in_out_key (str): The key to identify the filter in the filter set
+            val (float): Position to set the filter position to
+        """
+        positions[filter_set - 1, filter_num - 1] = val
+        self._set_pos(filter_set, in_out_key, val)
 
-    @_if_connected
     def _set_pos(self, filter_set: int, in_out_key: str, val: float) -> None:
         """
         Set position of a filter.
@@ -1047,14 +1381,17 @@ class Wrapper:
             in_out_key (str): The key to identify the filter in the filter set
             val (float): Position to set the filter position to
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         self._autosave_dict[f"{self.device_name}:{in_out_key}"] = val
 
         if self.filter_set_rbv.get() == filter_set - 1:
             self._set_filter_set(filter_set - 1)
 
-        self.write_autosave()
+        self._queue_autosave()
 
-    @_if_connected
     def _set_file_path(self, path: str) -> None:
         """
         Set file path of HDF5 attenuation file.
@@ -1062,11 +1399,14 @@ class Wrapper:
         Args:
             path (str): File path of HDF5 attenuation file
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         self.file_path_rbv.set(path)
 
         self._combine_file_path_and_name()
 
-    @_if_connected
     def _set_file_name(self, name: str) -> None:
         """
         Set file name of HDF5 attenuation file.
@@ -1074,17 +1414,21 @@ class Wrapper:
         Args:
             name (str): File name to set
         """
+        if not self.connected:
+            log.warning(NOT_CONNECTED)
+            return
+
         self.file_name_rbv.set(name)
 
         self._combine_file_path_and_name()
 
     def _combine_file_path_and_name(self) -> None:
         """Combine the file path and name into a full path."""
-        path: str = self.file_path.get()
-        name = self.file_name.get()
-
-        full_path: str = "/".join([path, name])
+        full_path: str = os.path.join(self.file_path.get(), self.file_name.get())
 
-        self.file_full_name.set(full_path)
+        if full_path != self.file_full_name.get():
+            self.file_full_name.set(full_path)
 
-        self.h5f._set_file_path(full_path)
+        # Already validated and in use, re-checking could only reject the same path
+        if full_path != self.h5f.file_path:
+            self.h5f._set_file_path(full_path)
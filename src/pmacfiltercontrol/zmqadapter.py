@@ -1,12 +1,15 @@
 """ZeroMQ adapter for use in a stream device."""
 
 import asyncio
-from dataclasses import dataclass
+import logging
+from dataclasses import dataclass, field
 from typing import Iterable, List, Optional
 
 import aiozmq
 import zmq
 
+log = logging.getLogger(__name__)
+
 
 @dataclass
 class ZeroMQAdapter:
@@ -16,10 +19,15 @@ class ZeroMQAdapter:
     zmq_port: int = 5555
     zmq_type: int = zmq.DEALER
     running: bool = False
+    send_queue_size: int = 64
+    # Set while the adapter is running, so that users can wait for it to start
+    running_event: asyncio.Event = field(
+        default_factory=asyncio.Event, init=False, repr=False, compare=False
+    )
 
     async def start_stream(self) -> None:
         """Start the ZeroMQ stream."""
-        print("starting stream...")
+        log.debug("starting stream...")
 
         self._socket = await aiozmq.create_zmq_stream(
             self.zmq_type, connect=f"tcp://{self.zmq_host}:{self.zmq_port}"
@@ -28,25 +36,35 @@ class ZeroMQAdapter:
             self._socket.transport.setsockopt(zmq.SUBSCRIBE, b"")
         self._socket.transport.setsockopt(zmq.LINGER, 0)
 
-        print(f"Stream started. {self._socket}")
+        log.info("Stream started. %s", self._socket)
 
     async def close_stream(self) -> None:
         """Close the ZeroMQ stream."""
         self._socket.close()
 
         self.running = False
+        self.running_event.clear()
 
-    def send_message(self, message: List[bytes]) -> None:
+    def send_message(self, message: List[bytes]) -> bool:
         """
         Send a message down the ZeroMQ stream.
 
-        Sets up an asyncio task to put the message on the message queue, before
-        being processed.
+        Puts the message on the send queue to be processed without blocking. If the
+        queue is full, e.g. the device is unreachable, the message is rejected rather
+        than discarding a message already queued.
 
         Args:
             message (str): The message to send down the ZeroMQ stream.
+
+        Returns:
+            bool: True if the message was queued, False if it was rejected
         """
-        self._send_message_queue.put_nowait(message)
+        try:
+            self._send_message_queue.put_nowait(message)
+        except asyncio.QueueFull:
+            log.error("Send queue full, message rejected: %s", message)
+            return False
+        return True
 
     async def _read_response(self) -> Optional[bytes]:
         """
@@ -85,18 +103,33 @@ class ZeroMQAdapter:
         """
         return await self._recv_message_queue.get()
 
+    def get_queued_responses(self) -> List[bytes]:
+        """
+        Get all responses already waiting in the received message queue.
+
+        Returns:
+            List[bytes]: Received response messages, oldest first
+        """
+        responses = []
+        while not self._recv_message_queue.empty():
+            responses.append(self._recv_message_queue.get_nowait())
+        return responses
+
     async def run_forever(self) -> None:
         """Run the ZeroMQ adapter continuously."""
-        self._send_message_queue: asyncio.Queue = asyncio.Queue()
+        self._send_message_queue: asyncio.Queue = asyncio.Queue(
+            maxsize=self.send_queue_size
+        )
         self._recv_message_queue: asyncio.Queue = asyncio.Queue()
 
         try:
             if getattr(self, "_socket", None) is None:
                 await self.start_stream()
         except Exception as e:
-            print("Exception when starting stream:", e)
+            log.error("Exception when starting stream: %s", e)
 
         self.running = True
+        self.running_event.set()
 
         if self.zmq_type == zmq.DEALER:
             await asyncio.gather(
@@ -118,7 +151,7 @@ class ZeroMQAdapter:
 
     async def _process_message_queue(self) -> None:
         """Process message queue for sending messages over the ZeroMQ stream."""
-        print("Processing message queue...")
+        log.debug("Processing message queue...")
         running = True
         while running:
             message = await self._send_message_queue.get()
@@ -137,24 +170,23 @@ class ZeroMQAdapter:
                     if self.zmq_type is not zmq.DEALER:
                         self._socket.write(message)
                     else:
-                        self._socket._transport._zmq_sock.send(b"", flags=zmq.SNDMORE)
-                        self._socket.write(message)
+                        # Empty delimiter frame expected by the REP socket
+                        self._socket.write([b"", *message])
                 except zmq.error.ZMQError as e:
-                    print("ZMQ Error", e)
+                    log.error("ZMQ Error %s", e)
                     await asyncio.sleep(1)
                 except Exception as e:
-                    print(f"Error, {e}")
-                    print("Unable to write to ZMQ stream, trying again...")
+                    log.error("Unable to write to ZMQ stream, trying again: %s", e)
                     await asyncio.sleep(1)
             else:
-                print("Socket closed...")
+                log.warning("Socket closed...")
                 await asyncio.sleep(5)
         else:
-            print("No message")
+            log.debug("No message")
 
     async def _process_response_queue(self) -> None:
         """Process response message queue from the ZeroMQ stream."""
-        print("Processing response queue...")
+        log.debug("Processing response queue...")
         running = True
         while running:
             resp = await self._read_response()
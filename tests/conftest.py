@@ -0,0 +1,47 @@
+import atexit
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pytest
+from softioc import builder
+
+from pmacfiltercontrol.pmacFilterControlWrapper import Wrapper
+
+DEVICE_NAME = "TEST-PFC-01"
+
+
+@pytest.fixture
+def make_wrapper(tmp_path: Path) -> Iterator[Callable[[], Wrapper]]:
+    """Create Wrappers with their records, but no IOC or streams running.
+
+    Each call replaces the records of the previous Wrapper, restoring from the same
+    autosave file.
+    """
+
+    def make_wrapper() -> Wrapper:
+        builder.ClearRecords()
+        builder.SetDeviceName(DEVICE_NAME)
+        wrapper = Wrapper(
+            ip="127.0.0.1",
+            port=9000,
+            event_stream_port=9001,
+            builder=builder,
+            device_name=DEVICE_NAME,
+            filter_set_total=2,
+            filters_per_set=4,
+            detector="TEST-DET-01",
+            motors="TEST-MOT-01",
+            autosave_file_path=str(tmp_path / "autosave.txt"),
+            hdf_file_path=str(tmp_path),
+        )
+        # Not an IOC exiting, so leave the autosave files alone
+        atexit.unregister(wrapper.write_autosave)
+        return wrapper
+
+    yield make_wrapper
+    builder.ClearRecords()
+
+
+@pytest.fixture
+def wrapper(make_wrapper: Callable[[], Wrapper]) -> Wrapper:
+    return make_wrapper()
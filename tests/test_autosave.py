@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime
+from typing import Callable, Dict
+
+import orjson
+import pytest
+
+from pmacfiltercontrol import pmacFilterControlWrapper
+from pmacfiltercontrol.pmacFilterControlWrapper import SHUTTER_OPEN, Wrapper
+
+# Long enough for a queued autosave to be written
+AUTOSAVE_WAIT = Wrapper.AUTOSAVE_PERIOD + 0.5
+
+
+def read_autosave(wrapper: Wrapper) -> Dict[str, float]:
+    return orjson.loads(wrapper.autosave_file.read_bytes())
+
+
+@pytest.mark.asyncio
+async def test_changes_written_together(wrapper: Wrapper):
+    wrapper._set_shutter_pos(100.0, SHUTTER_OPEN)
+    wrapper._set_shutter_pos(200.0, SHUTTER_OPEN)
+    assert not wrapper.autosave_file.exists()
+
+    await asyncio.sleep(AUTOSAVE_WAIT)
+
+    assert read_autosave(wrapper)[wrapper.shutter_pos_open.name] == 200.0
+
+
+@pytest.mark.asyncio
+async def test_pending_changes_written_at_exit(wrapper: Wrapper):
+    wrapper._set_shutter_pos(100.0, SHUTTER_OPEN)
+    wrapper.write_autosave()
+
+    assert read_autosave(wrapper)[wrapper.shutter_pos_open.name] == 100.0
+
+
+def test_nothing_written_at_exit_without_changes(wrapper: Wrapper):
+    wrapper.write_autosave()
+
+    assert not wrapper.autosave_file.exists()
+
+
+@pytest.mark.asyncio
+async def test_json_round_trip(make_wrapper: Callable[[], Wrapper]):
+    wrapper = make_wrapper()
+    wrapper._set_shutter_pos(250.0, SHUTTER_OPEN)
+    await asyncio.sleep(AUTOSAVE_WAIT)
+    assert wrapper.autosave_file.read_bytes().startswith(b"{")
+
+    restored = make_wrapper()
+
+    assert restored.shutter_pos_open.get() == 250.0
+    assert restored._autosave_dict == read_autosave(wrapper)
+
+
+@pytest.mark.asyncio
+async def test_legacy_round_trip(make_wrapper: Callable[[], Wrapper]):
+    wrapper = make_wrapper()
+    wrapper._set_shutter_pos(10.0, SHUTTER_OPEN)
+    wrapper.write_autosave()
+    # Rewrite the file in the older "key value" format
+    values = read_autosave(wrapper)
+    wrapper.autosave_file.write_text(
+        "".join(f"{key} {value}\n" for key, value in values.items())
+    )
+
+    restored = make_wrapper()
+
+    assert restored.shutter_pos_open.get() == 10.0
+    assert restored._autosave_dict == values
+
+    # Rewritten as JSON by the next save
+    restored._set_shutter_pos(20.0, SHUTTER_OPEN)
+    await asyncio.sleep(AUTOSAVE_WAIT)
+
+    assert read_autosave(restored) == {
+        **values,
+        restored.shutter_pos_open.name: 20.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_hourly_backup(wrapper: Wrapper, monkeypatch: pytest.MonkeyPatch):
+    now = datetime(2024, 1, 2, 3, 4, 5)
+
+    class MockDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+
+    monkeypatch.setattr(pmacFilterControlWrapper, "dt", MockDatetime)
+    backup_file = wrapper.autosave_file.with_name("autosave-20240102-03.txt")
+
+    wrapper._set_shutter_pos(100.0, SHUTTER_OPEN)
+    await asyncio.sleep(AUTOSAVE_WAIT)
+    first_contents = wrapper.autosave_file.read_bytes()
+    assert backup_file.read_bytes() == first_contents
+
+    # Only the first save each hour writes the backup
+    wrapper._set_shutter_pos(200.0, SHUTTER_OPEN)
+    await asyncio.sleep(AUTOSAVE_WAIT)
+    assert backup_file.read_bytes() == first_contents
+
+    now = datetime(2024, 1, 2, 4, 0, 0)
+    wrapper._set_shutter_pos(300.0, SHUTTER_OPEN)
+    await asyncio.sleep(AUTOSAVE_WAIT)
+    assert (
+        wrapper.autosave_file.with_name("autosave-20240102-04.txt").read_bytes()
+        == wrapper.autosave_file.read_bytes()
+    )
+
+
+@pytest.mark.asyncio
+async def test_unchanged_not_written(wrapper: Wrapper):
+    wrapper._set_shutter_pos(100.0, SHUTTER_OPEN)
+    await asyncio.sleep(AUTOSAVE_WAIT)
+    wrapper.autosave_file.unlink()
+
+    wrapper._set_shutter_pos(100.0, SHUTTER_OPEN)
+    await asyncio.sleep(AUTOSAVE_WAIT)
+
+    assert not wrapper.autosave_file.exists()
+
+
+@pytest.mark.asyncio
+async def test_failed_write_retried(wrapper: Wrapper, monkeypatch: pytest.MonkeyPatch):
+    def replace(src, dst):
+        raise OSError("Disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(pmacFilterControlWrapper.os, "replace", replace)
+        wrapper._set_shutter_pos(100.0, SHUTTER_OPEN)
+        await asyncio.sleep(AUTOSAVE_WAIT)
+    assert not wrapper.autosave_file.exists()
+
+    # Written by the next autosave, even though nothing has changed
+    wrapper._set_shutter_pos(100.0, SHUTTER_OPEN)
+    await asyncio.sleep(AUTOSAVE_WAIT)
+
+    assert read_autosave(wrapper)[wrapper.shutter_pos_open.name] == 100.0
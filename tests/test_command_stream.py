@@ -0,0 +1,47 @@
+import asyncio
+
+import orjson
+import pytest
+
+from pmacfiltercontrol.pmacFilterControlWrapper import Wrapper
+
+STATUS = {
+    "state": 1,
+    "version": "1.0",
+    "process_duration": 10.0,
+    "process_period": 1000.0,
+    "last_received_frame": 5,
+    "last_processed_frame": 5,
+    "time_since_last_message": 0.5,
+    "current_attenuation": 3,
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "reply",
+    [
+        b'{"status": ',
+        orjson.dumps({"status": {**STATUS, "version": 1}}),
+        orjson.dumps({"status": {k: v for k, v in STATUS.items() if k != "version"}}),
+    ],
+    ids=["malformed", "wrong_type", "missing_field"],
+)
+async def test_invalid_status_skipped(wrapper: Wrapper, reply: bytes):
+    stream = wrapper.zmq_stream
+    stream.running = True
+    stream._recv_message_queue = asyncio.Queue()
+    monitor = asyncio.ensure_future(wrapper.monitor_command_stream(stream))
+
+    stream._recv_message_queue.put_nowait(reply)
+    await asyncio.sleep(0.1)
+    assert not wrapper.connected
+    stream._recv_message_queue.put_nowait(orjson.dumps({"status": STATUS}))
+    await asyncio.sleep(0.1)
+
+    # The monitor is still running and handled the valid status
+    assert not monitor.done()
+    monitor.cancel()
+    assert wrapper.connected
+    assert wrapper.version.get() == "1.0"
+    assert wrapper.current_attenuation.get() == 3
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Dict, List
+
+import orjson
+import pytest
+
+from pmacfiltercontrol.pmacFilterControlWrapper import MODE, REQ_STATUS, Wrapper
+
+MODE_CONTINUOUS = MODE.index("CONTINUOUS")
+
+
+@pytest.fixture
+def sent(wrapper: Wrapper, monkeypatch: pytest.MonkeyPatch) -> List[Dict]:
+    """Requests sent by the wrapper, decoded."""
+    sent: List[Dict] = []
+
+    def send_message(message: List[bytes]) -> bool:
+        sent.append(orjson.loads(message[0]))
+        return True
+
+    monkeypatch.setattr(wrapper.zmq_stream, "send_message", send_message)
+    wrapper.connected = True
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_params_sent_together(wrapper: Wrapper, sent: List[Dict]):
+    wrapper._configure_param({"timeout": 3.0})
+    wrapper._configure_param({"shutter_closed_position": 400.0})
+    wrapper._configure_param({"timeout": 4.0})
+    await asyncio.sleep(0)
+
+    assert sent == [
+        {
+            "command": "configure",
+            "params": {"timeout": 4.0, "shutter_closed_position": 400.0},
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_params_sent_before_other_commands(wrapper: Wrapper, sent: List[Dict]):
+    wrapper._configure_param({"timeout": 3.0})
+    wrapper._set_mode(MODE_CONTINUOUS)
+    wrapper._configure_param({"timeout": 4.0})
+    await asyncio.sleep(0)
+
+    assert sent == [
+        {"command": "configure", "params": {"timeout": 3.0}},
+        {"command": "configure", "params": {"mode": MODE_CONTINUOUS}},
+        {"command": "configure", "params": {"timeout": 4.0}},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_thresholds_sent_in_order(wrapper: Wrapper, sent: List[Dict]):
+    wrapper._set_threshold("high1", 5)
+    wrapper._set_threshold("low1", 1)
+    wrapper._set_mode(MODE_CONTINUOUS)
+    await asyncio.sleep(0)
+
+    thresholds = dict(wrapper.pixel_count_thresholds)
+    assert thresholds["high1"] == 5 and thresholds["low1"] == 1
+    assert sent == [
+        {"command": "configure", "params": {"pixel_count_thresholds": thresholds}},
+        {"command": "configure", "params": {"mode": MODE_CONTINUOUS}},
+    ]
+
+
+def test_rejected_when_send_queue_full(wrapper: Wrapper):
+    wrapper.connected = True
+    wrapper.zmq_stream._send_message_queue = asyncio.Queue(maxsize=1)
+    assert wrapper._send_message(REQ_STATUS)
+    mode = wrapper.mode_rbv.get()
+
+    wrapper._set_mode(MODE_CONTINUOUS)
+
+    # The queued message is kept and the mode is left unchanged
+    assert wrapper.zmq_stream._send_message_queue.get_nowait() == [REQ_STATUS]
+    assert wrapper.zmq_stream._send_message_queue.empty()
+    assert wrapper.mode_rbv.get() == mode
@@ -0,0 +1,106 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Dict
+
+import h5py
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from pmacfiltercontrol.hdfadapter import (
+    ADJUSTMENT_KEY,
+    ATTENUATION_KEY,
+    FRAME_BUFFER_SIZE,
+    FRAME_NUMBER_KEY,
+)
+from pmacfiltercontrol.pmacFilterControlWrapper import Wrapper
+
+# Long enough for the writer task to handle everything queued
+SETTLE_TIME = 0.5
+
+
+def frame(frame_number: int, attenuation: int = 0) -> Dict:
+    return {
+        FRAME_NUMBER_KEY: frame_number,
+        ADJUSTMENT_KEY: 0,
+        ATTENUATION_KEY: attenuation,
+    }
+
+
+@pytest_asyncio.fixture
+async def writer(wrapper: Wrapper) -> AsyncIterator[Wrapper]:
+    wrapper.connected = True
+    task = asyncio.ensure_future(wrapper._frame_writer())
+    yield wrapper
+    assert not task.done()
+    task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_frames_written_before_close(writer: Wrapper, tmp_path: Path):
+    frames = FRAME_BUFFER_SIZE + 2
+    writer.open_file(1)
+    for i in range(frames):
+        writer._frame_queue.put_nowait(frame(i, attenuation=i % 16))
+    writer.close_file(1)
+
+    # Frames for the next file must not be written to the first one
+    writer.file_name.set("second.h5")
+    writer._combine_file_path_and_name()
+    writer.open_file(1)
+    writer._frame_queue.put_nowait(frame(0, attenuation=1))
+    writer.close_file(1)
+    await asyncio.sleep(SETTLE_TIME)
+
+    with h5py.File(tmp_path / "attenuation.h5", "r") as f:
+        np.testing.assert_array_equal(f[ATTENUATION_KEY][()], np.arange(frames) % 16)
+    with h5py.File(tmp_path / "second.h5", "r") as f:
+        np.testing.assert_array_equal(f[ATTENUATION_KEY][()], [1])
+
+
+@pytest.mark.asyncio
+async def test_frames_written_every_flush_period(writer: Wrapper, tmp_path: Path):
+    writer.open_file(1)
+    writer._frame_queue.put_nowait(frame(0, attenuation=3))
+    await asyncio.sleep(SETTLE_TIME)
+
+    assert writer.h5f._frame_count == 1
+    writer.close_file(1)
+    await asyncio.sleep(SETTLE_TIME)
+
+
+@pytest.mark.asyncio
+async def test_expected_frames(writer: Wrapper):
+    writer.file_expected_frames.set(1000)
+    writer.open_file(1)
+    await asyncio.sleep(SETTLE_TIME)
+
+    assert writer.h5f._dset_size == 1000
+    writer.close_file(1)
+    await asyncio.sleep(SETTLE_TIME)
+
+
+@pytest.mark.asyncio
+async def test_failed_open(writer: Wrapper, tmp_path: Path):
+    (tmp_path / "attenuation.h5").touch()
+    writer.open_file(1)
+    await asyncio.sleep(SETTLE_TIME)
+
+    assert not writer.h5f.file_open
+    assert not writer._file_requested
+    assert writer.file_open.get() == 0
+
+
+@pytest.mark.asyncio
+async def test_write_error(writer: Wrapper, monkeypatch: pytest.MonkeyPatch):
+    def write_frames(frames: np.ndarray) -> None:
+        raise OSError("Disk full")
+
+    monkeypatch.setattr(writer.h5f, "_write_frames", write_frames)
+    writer.open_file(1)
+    writer._frame_queue.put_nowait(frame(0))
+    writer.close_file(1)
+    await asyncio.sleep(SETTLE_TIME)
+
+    # The writer task is still running and the file was closed
+    assert not writer.h5f.file_open
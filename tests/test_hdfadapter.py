@@ -0,0 +1,198 @@
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import h5py
+import numpy as np
+import pytest
+
+from pmacfiltercontrol.hdfadapter import (
+    ADJUSTMENT_KEY,
+    ATTENUATION_KEY,
+    FILTERS_MOVING_FLAG_KEY,
+    FRAME_BUFFER_SIZE,
+    FRAME_NUMBER_KEY,
+    UID_KEY,
+    HDFAdapter,
+)
+
+
+def frame(frame_number: int, adjustment: int = 0, attenuation: int = 0) -> Dict:
+    return {
+        FRAME_NUMBER_KEY: frame_number,
+        ADJUSTMENT_KEY: adjustment,
+        ATTENUATION_KEY: attenuation,
+    }
+
+
+def write_frames(h5f: HDFAdapter, frames: List[Dict]) -> None:
+    for f in frames:
+        h5f._buffer_frame(f)
+    h5f._flush_buffer()
+
+
+def read_datasets(file_path: Path) -> Dict[str, np.ndarray]:
+    with h5py.File(file_path, "r") as f:
+        return {
+            key: f[key][()]
+            for key in (
+                ADJUSTMENT_KEY,
+                ATTENUATION_KEY,
+                UID_KEY,
+                FILTERS_MOVING_FLAG_KEY,
+            )
+        }
+
+
+@pytest.fixture
+def file_path(tmp_path: Path) -> Path:
+    return tmp_path / "attenuation.h5"
+
+
+@pytest.fixture
+def h5f(file_path: Path) -> Iterator[HDFAdapter]:
+    h5f = HDFAdapter(str(file_path))
+    h5f._open_file()
+    assert h5f.file_open
+    yield h5f
+    h5f._close_file()
+
+
+def test_batched_write(h5f: HDFAdapter, file_path: Path):
+    write_frames(h5f, [frame(i, adjustment=1, attenuation=i) for i in range(5)])
+    h5f._close_file()
+
+    datasets = read_datasets(file_path)
+    np.testing.assert_array_equal(datasets[UID_KEY], [1, 2, 3, 4, 5])
+    np.testing.assert_array_equal(datasets[ADJUSTMENT_KEY], [1, 1, 1, 1, 1])
+    np.testing.assert_array_equal(datasets[ATTENUATION_KEY], [0, 1, 2, 3, 4])
+
+
+def test_buffer_full():
+    h5f = HDFAdapter()
+    for i in range(FRAME_BUFFER_SIZE - 1):
+        assert not h5f._buffer_frame(frame(i))
+    assert h5f._buffer_frame(frame(FRAME_BUFFER_SIZE - 1))
+
+    buffered = h5f._take_buffered_frames()
+    assert buffered is not None and len(buffered) == FRAME_BUFFER_SIZE
+    assert h5f._take_buffered_frames() is None
+
+
+def test_write_with_gaps(h5f: HDFAdapter, file_path: Path):
+    write_frames(h5f, [frame(0, attenuation=1), frame(1, attenuation=2)])
+    write_frames(h5f, [frame(5, attenuation=3)])
+    h5f._close_file()
+
+    datasets = read_datasets(file_path)
+    np.testing.assert_array_equal(datasets[UID_KEY], [1, 2, 0, 0, 0, 6])
+    np.testing.assert_array_equal(datasets[ATTENUATION_KEY], [1, 2, 0, 0, 0, 3])
+
+
+def test_write_repeated_frames(h5f: HDFAdapter, file_path: Path):
+    write_frames(
+        h5f,
+        [frame(0, attenuation=1), frame(1, attenuation=2), frame(1, attenuation=3)],
+    )
+    h5f._close_file()
+
+    datasets = read_datasets(file_path)
+    np.testing.assert_array_equal(datasets[UID_KEY], [1, 2])
+    np.testing.assert_array_equal(datasets[ATTENUATION_KEY], [1, 3])
+
+
+def test_write_out_of_order_frames(h5f: HDFAdapter, file_path: Path):
+    write_frames(h5f, [frame(i, attenuation=i + 10) for i in (3, 1, 2, 0)])
+    write_frames(h5f, [frame(6, attenuation=16), frame(4, attenuation=14)])
+    h5f._close_file()
+
+    datasets = read_datasets(file_path)
+    np.testing.assert_array_equal(datasets[UID_KEY], [1, 2, 3, 4, 5, 0, 7])
+    np.testing.assert_array_equal(
+        datasets[ATTENUATION_KEY], [10, 11, 12, 13, 14, 0, 16]
+    )
+
+
+def test_filters_moving(h5f: HDFAdapter, file_path: Path):
+    write_frames(
+        h5f,
+        [
+            frame(0, adjustment=0, attenuation=5),
+            frame(1, adjustment=-1, attenuation=5),
+            frame(2, adjustment=-1, attenuation=0),
+            frame(3, adjustment=1, attenuation=5),
+            frame(4, adjustment=1, attenuation=15),
+        ],
+    )
+    h5f._close_file()
+
+    datasets = read_datasets(file_path)
+    np.testing.assert_array_equal(datasets[FILTERS_MOVING_FLAG_KEY], [0, 1, 0, 1, 0])
+
+
+def test_close_trims_datasets(h5f: HDFAdapter, file_path: Path):
+    write_frames(h5f, [frame(i) for i in range(3)])
+    write_frames(h5f, [frame(3)])
+    # Datasets grow geometrically, leaving unused capacity
+    assert h5f._dset_size > 4
+
+    h5f._close_file()
+
+    datasets = read_datasets(file_path)
+    for dataset in datasets.values():
+        assert dataset.shape == (4,)
+
+
+def test_close_writes_buffered_frames(h5f: HDFAdapter, file_path: Path):
+    h5f._buffer_frame(frame(0, attenuation=7))
+    h5f._close_file()
+
+    datasets = read_datasets(file_path)
+    np.testing.assert_array_equal(datasets[ATTENUATION_KEY], [7])
+
+
+def test_empty_file(h5f: HDFAdapter, file_path: Path):
+    h5f._close_file()
+    assert not h5f.file_open
+
+    datasets = read_datasets(file_path)
+    for dataset in datasets.values():
+        np.testing.assert_array_equal(dataset, [0])
+
+
+def test_write_after_close(h5f: HDFAdapter):
+    h5f._close_file()
+    h5f._buffer_frame(frame(0))
+    h5f._flush_buffer()
+    assert h5f._take_buffered_frames() is None
+
+
+def test_open_existing_file(file_path: Path):
+    file_path.touch()
+    h5f = HDFAdapter(str(file_path))
+    h5f._open_file()
+    assert not h5f.file_open
+
+
+def test_open_missing_directory(tmp_path: Path):
+    file_path = tmp_path / "data" / "attenuation.h5"
+    file_path.parent.mkdir()
+    h5f = HDFAdapter()
+    h5f._set_file_path(str(file_path))
+    assert h5f.file_path == str(file_path)
+
+    file_path.parent.rmdir()
+    h5f._open_file()
+    assert not h5f.file_open
+
+
+def test_preallocate(file_path: Path):
+    h5f = HDFAdapter(str(file_path))
+    h5f._open_file(expected_frames=100)
+    write_frames(h5f, [frame(i) for i in range(10)])
+    assert h5f._dset_size == 100
+
+    h5f._close_file()
+
+    datasets = read_datasets(file_path)
+    for dataset in datasets.values():
+        assert dataset.shape == (10,)